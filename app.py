@@ -1,9 +1,11 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from flask.logging import default_handler
+from werkzeug.serving import make_server
 import os
 import tempfile
 import shutil
 import json
-from datetime import datetime
 import re
 
 # 延迟导入git模块，避免在没有Git环境时导入失败
@@ -15,11 +17,124 @@ import webbrowser
 import threading
 import time
 import subprocess
+import socket
+import logging
+import logging.handlers
+import queue
+import atexit
+import warnings
+import copy
+import hashlib
+import asyncio
+from collections import OrderedDict
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import cached_property, lru_cache
 from pathlib import Path
 
-def setup_git_environment():
-    """设置Git环境变量，确保在没有Python环境的机器上也能运行"""
-    global git
+# orjson为可选依赖，未安装时使用Flask默认的JSON序列化
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# waitress为可选依赖，打包后的exe优先使用waitress运行服务，未安装时使用Werkzeug多线程服务器
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+# 并行检查分支合并状态时的最大线程数（git子进程同时受CPU和磁盘限制，按CPU核数取值并设上限）
+MAX_CHECK_WORKERS = min(16, (os.cpu_count() or 4) * 2)
+# 同时拉取多个远程仓库时的并行数
+FETCH_JOBS = 8
+# 已连接仓库的复用时间（秒），超时后重新连接并拉取远程分支
+CHECKER_CACHE_TTL = 60
+# 打包后的exe使用waitress运行时的工作线程数
+WAITRESS_THREADS = 8
+# 最多缓存的已连接仓库数
+CHECKER_CACHE_SIZE = 16
+# 同一本地克隆两次fetch之间的最小间隔（秒）
+FETCH_MIN_INTERVAL = 30
+# 距上次fetch不超过该时间（秒）时改为后台fetch，先使用本地数据返回
+BACKGROUND_FETCH_MAX_AGE = 300
+# fetch失败后的重试等待时间（秒）
+FETCH_RETRY_DELAYS = (1, 2)
+# 合并检查前拉取远程分支失败时的提示
+FETCH_FAILED_MESSAGE = '拉取远程分支失败，检查结果基于本地已有的分支数据，可能不是最新状态'
+# temp_repos目录的大小上限（字节），超出后按最近使用时间清理最旧的仓库
+TEMP_REPOS_MAX_BYTES = 5 * 1024 * 1024 * 1024
+# 批量预取合并提交时，最多读取目标分支最近的合并提交数
+MERGE_SCAN_LIMIT = 500
+# 分支合并检查结果缓存的最大条数
+MERGE_INFO_CACHE_SIZE = 4096
+# 平台配置的必填字段
+PLATFORM_REQUIRED_FIELDS = ('name', 'base_url', 'merge_request_path', 'commit_path', 'ssh_prefix', 'https_prefix')
+# 合并检查关键字的最大长度
+MAX_KEYWORD_LENGTH = 200
+# 整次合并检查结果缓存的最大条数
+MERGE_RESULT_CACHE_SIZE = 128
+
+# 常见的MR ID模式（预编译），以及匹配后返回的编号前缀
+MR_ID_PATTERNS = [
+    (re.compile(r'merge request !(\d+)', re.IGNORECASE), '!'),   # GitLab: merge request !123
+    (re.compile(r'!(\d+)', re.IGNORECASE), '!'),                 # GitLab: !123
+    (re.compile(r'pull request #(\d+)', re.IGNORECASE), '#'),    # GitHub: pull request #123
+    (re.compile(r'#(\d+)', re.IGNORECASE), '#'),                 # GitHub: #123
+    (re.compile(r'PR (\d+)', re.IGNORECASE), 'PR '),             # Azure DevOps: PR 123
+    (re.compile(r'pr (\d+)', re.IGNORECASE), 'PR '),             # Azure DevOps: pr 123
+]
+
+# 提交时间的显示格式（定长，可直接按字符串排序）
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def format_timestamp(timestamp):
+    """将Unix时间戳格式化为本地时间字符串"""
+    return time.strftime(DATE_FORMAT, time.localtime(int(timestamp)))
+
+# 启动时探测到的Git版本信息，避免重复启动git进程查询
+git_version = None
+
+def get_git_cache_path():
+    """获取Git路径缓存文件的位置"""
+    base_dir = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base_dir, 'pyBranchCheck', 'git.json')
+
+def load_git_path_cache():
+    """读取上次探测到的Git路径，缓存不存在或路径已失效时返回None"""
+    try:
+        with open(get_git_cache_path(), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if os.path.exists(cached.get('git_path', '')):
+            return cached
+    except Exception:
+        pass
+    return None
+
+def save_git_path_cache(git_path, version):
+    """保存探测到的Git路径，下次启动时跳过探测"""
+    try:
+        cache_path = get_git_cache_path()
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'git_path': git_path, 'git_version': version}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"保存Git路径缓存失败: {e}")
+
+def add_git_to_path(git_path):
+    """将Git所在目录添加到PATH"""
+    git_dir = str(Path(git_path).parent)
+    current_path = os.environ.get('PATH', '')
+    if git_dir not in current_path:
+        os.environ['PATH'] = f"{git_dir};{current_path}"
+
+def setup_git_environment(rediscover=False):
+    """设置Git环境变量，确保在没有Python环境的机器上也能运行
+
+    rediscover为True时忽略缓存的Git路径，重新探测
+    """
+    global git, git_version
     
     if sys.platform.startswith('win'):
         os.environ['GIT_PYTHON_ENCODING'] = 'utf-8'
@@ -31,35 +146,41 @@ def setup_git_environment():
             # 设置Git相关环境变量
             os.environ['GIT_PYTHON_REFRESH'] = 'quiet'
             
-            # 尝试找到Git可执行文件
-            git_paths = [
-                r'C:\Program Files\Git\bin\git.exe',
-                r'C:\Program Files (x86)\Git\bin\git.exe',
-                r'C:\Git\bin\git.exe',
-                'git.exe'  # 如果Git在PATH中
-            ]
-            
-            git_found = False
-            for git_path in git_paths:
-                try:
-                    if os.path.exists(git_path) or git_path == 'git.exe':
-                        # 测试Git是否可用
-                        result = subprocess.run([git_path, '--version'], 
-                                               capture_output=True, text=True, timeout=5)
-                        if result.returncode == 0:
-                            if git_path != 'git.exe':
+            cached = None if rediscover else load_git_path_cache()
+            if cached:
+                # 使用上次探测到的Git路径
+                add_git_to_path(cached['git_path'])
+                git_version = cached.get('git_version')
+            elif shutil.which('git'):
+                # Git已在PATH中，无需探测
+                pass
+            else:
+                # 尝试找到Git可执行文件
+                git_paths = [
+                    r'C:\Program Files\Git\bin\git.exe',
+                    r'C:\Program Files (x86)\Git\bin\git.exe',
+                    r'C:\Git\bin\git.exe',
+                ]
+                
+                git_found = False
+                for git_path in git_paths:
+                    try:
+                        if os.path.exists(git_path):
+                            # 测试Git是否可用
+                            result = subprocess.run([git_path, '--version'], 
+                                                   capture_output=True, text=True, timeout=5)
+                            if result.returncode == 0:
                                 # 将Git目录添加到PATH
-                                git_dir = str(Path(git_path).parent)
-                                current_path = os.environ.get('PATH', '')
-                                if git_dir not in current_path:
-                                    os.environ['PATH'] = f"{git_dir};{current_path}"
-                            git_found = True
-                            break
-                except Exception:
-                    continue
-            
-            if not git_found:
-                raise Exception("未找到Git，请确保已安装Git并添加到系统PATH中")
+                                add_git_to_path(git_path)
+                                git_version = result.stdout.strip()
+                                save_git_path_cache(git_path, git_version)
+                                git_found = True
+                                break
+                    except Exception:
+                        continue
+                
+                if not git_found:
+                    raise Exception("未找到Git，请确保已安装Git并添加到系统PATH中")
     
     # 尝试导入git模块
     try:
@@ -94,11 +215,41 @@ def get_resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """使用orjson序列化JSON响应，分支列表等较大的响应序列化更快"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # 初始化Flask应用 - 使用默认模板配置
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+# 响应JSON不排序键、不缩进（未安装orjson时的标准库序列化同样生效）
+app.json.sort_keys = False
+app.json.compact = True
+
+def setup_queue_logging(logger):
+    """将日志经队列交给后台线程输出，请求线程不会阻塞在控制台写入上"""
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    logger.removeHandler(default_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    # 退出前输出队列中剩余的日志
+    atexit.register(listener.stop)
+    return listener
 
+setup_queue_logging(app.logger)
+
+@lru_cache(maxsize=1)
 def get_config_path():
-    """获取配置文件路径 - 跨平台兼容"""
+    """获取配置文件路径 - 跨平台兼容（进程运行期间结果不变，缓存计算结果）"""
     # 检查是否为打包后的可执行文件
     is_exe = getattr(sys, 'frozen', False)
     
@@ -226,10 +377,34 @@ def save_config(config):
                 print(f"警告: 没有写入权限到目录 {exe_dir}")
                 print("请尝试以管理员身份运行程序，或将程序移动到有写入权限的目录")
         
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=4)
+        text = json.dumps(config, ensure_ascii=False, indent=4)
+        
+        # 内容与配置文件完全一致时无需重写
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                if f.read() == text:
+                    return True
+        except OSError:
+            pass
+        
+        # 先写入同目录下的临时文件再替换，避免写入中途退出导致配置文件损坏
+        fd, tmp_path = tempfile.mkstemp(dir=config_dir or None, prefix='.config', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            # mkstemp创建的临时文件只有所有者可读写，替换前沿用原配置文件的权限
+            if os.path.exists(config_path):
+                shutil.copymode(config_path, tmp_path)
+            os.replace(tmp_path, config_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
         
         print(f"✅ 配置文件已保存: {config_path}")
+        invalidate_config_cache()
         return True
     except PermissionError as e:
         print(f"❌ 保存配置文件失败 - 权限不足: {e}")
@@ -239,32 +414,255 @@ def save_config(config):
         print(f"❌ 保存配置文件失败: {e}")
         return False
 
+# 配置缓存：配置文件修改时间不变时复用已解析的配置
+_config_cache = {'stamp': None, 'config': None, 'indexes': None}
+_config_cache_lock = threading.Lock()
+
+def _get_config_stamp(config_path):
+    """获取配置文件的修改标记（修改时间+大小），文件不存在时返回None"""
+    try:
+        stat = os.stat(config_path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _build_platform_prefix_list(platforms):
+    """按前缀长度从长到短排列的 (前缀, 平台配置) 列表，最长前缀优先匹配，避免短前缀误匹配"""
+    prefixes = []
+    for platform_info in platforms.values():
+        for prefix_key in ('ssh_prefix', 'https_prefix'):
+            prefix = platform_info.get(prefix_key, '')
+            if prefix:
+                prefixes.append((prefix, platform_info))
+    prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+    return prefixes
+
+def _build_repo_url_index(repositories):
+    """按URL建立仓库配置索引，URL重复时保留第一个"""
+    index = {}
+    for repo in repositories:
+        url = repo.get('url')
+        if url:
+            index.setdefault(url, repo)
+    return index
+
+def _build_config_indexes(config):
+    """预先建立配置的查找索引：仓库URL索引和按长度排序的平台前缀列表"""
+    platforms = config.get('platforms', {})
+    return {
+        'repo_by_url': _build_repo_url_index(config.get('repositories', [])),
+        'platform_prefix_list': _build_platform_prefix_list(platforms),
+    }
+
+def get_cached_config():
+    """获取缓存的配置，配置文件变化时自动重新加载
+    
+    返回的配置对象在多个请求间共享，调用方只能读取，需要修改时请使用load_config()
+    """
+    return get_cached_config_with_indexes()[0]
+
+def get_cached_config_with_indexes():
+    """获取缓存的配置及加载时建立的查找索引，返回 (config, indexes)，两者总是对应同一次加载"""
+    config_path = get_config_path()
+    stamp = _get_config_stamp(config_path)
+    with _config_cache_lock:
+        if _config_cache['config'] is not None and stamp is not None and stamp == _config_cache['stamp']:
+            return _config_cache['config'], _config_cache['indexes']
+    # 在锁外加载和解析：load_config在配置文件缺失或无效时会调用save_config，
+    # 而save_config会调用invalidate_config_cache获取同一把锁
+    config = load_config()
+    indexes = _build_config_indexes(config)
+    if stamp is None:
+        # load_config可能刚创建了配置文件，重新读取修改标记
+        stamp = _get_config_stamp(config_path)
+    with _config_cache_lock:
+        _config_cache['config'] = config
+        _config_cache['indexes'] = indexes
+        _config_cache['stamp'] = stamp
+    return config, indexes
+
+def invalidate_config_cache():
+    """使配置缓存失效，下次读取时重新加载"""
+    with _config_cache_lock:
+        _config_cache['stamp'] = None
+        _config_cache['config'] = None
+
+# 分支合并检查结果缓存（LRU），键为 (仓库, 源分支, 源提交, 目标提交)
+_merge_info_cache = OrderedDict()
+_merge_info_cache_lock = threading.Lock()
+
+# 整次合并检查结果缓存（LRU），键为 (仓库, 关键字, 目标分支, 目标提交, 所有分支最后提交的摘要)
+_merge_result_cache = OrderedDict()
+_merge_result_cache_lock = threading.Lock()
+
+# 本地克隆最近一次fetch的时间，键为本地路径
+_repo_fetch_times = {}
+_prune_lock = threading.Lock()
+# 正在后台fetch的本地路径
+_background_fetching = set()
+_background_fetch_lock = threading.Lock()
+# 每个本地路径一把fetch锁，避免后台fetch和同步fetch在同一个克隆上同时运行git fetch
+_fetch_locks = {}
+
+def _get_fetch_lock(repo_path):
+    """获取本地路径对应的fetch锁"""
+    with _background_fetch_lock:
+        return _fetch_locks.setdefault(repo_path, threading.Lock())
+
+def touch_temp_repo(repo_path):
+    """更新临时仓库目录的修改时间，作为最近使用时间"""
+    try:
+        os.utime(repo_path)
+    except OSError:
+        pass
+
+def get_dir_size(path):
+    """递归计算目录大小（字节）"""
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += get_dir_size(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
+def prune_temp_repos(temp_dir, keep_path=None):
+    """temp_repos超出大小上限时，按最近使用时间删除最旧的仓库（不删除keep_path）"""
+    if not _prune_lock.acquire(blocking=False):
+        return
+    try:
+        repos = []
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    repos.append((entry.stat().st_mtime, entry.path, get_dir_size(entry.path)))
+        
+        total_size = sum(size for _, _, size in repos)
+        for _, path, size in sorted(repos):
+            if total_size <= TEMP_REPOS_MAX_BYTES:
+                break
+            if keep_path and os.path.abspath(path) == os.path.abspath(keep_path):
+                continue
+            # 有请求正在使用该仓库时跳过，否则先移除缓存中指向该仓库的检查器
+            entries = _acquire_checkers_for_path(path)
+            if entries is None:
+                continue
+            try:
+                with _background_fetch_lock:
+                    fetching = path in _background_fetching
+                if fetching:
+                    continue
+                _evict_checker_entries(entries)
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                for entry in entries:
+                    entry['lock'].release()
+            _repo_fetch_times.pop(path, None)
+            with _background_fetch_lock:
+                _fetch_locks.pop(path, None)
+            total_size -= size
+            print(f"🧹 已清理临时仓库: {path}")
+    except Exception as e:
+        print(f"清理临时仓库时出错: {e}")
+    finally:
+        _prune_lock.release()
+
 class GitBranchChecker:
     def __init__(self, repo_input):
         self.repo_input = repo_input
         self.repo = None
         self.is_remote = self._is_remote_url(repo_input)
         self.local_path = None
-        self.config = load_config()
-        self.current_repo_config = None
-        self.platform_config = None
+        self._thread_local = threading.local()
+        # 祖先关系检查结果缓存，键为 (源提交, 目标提交)
+        self._ancestor_cache = {}
+        # 分支引用缓存，键为分支名（引用对象绑定Repo，因此每个线程的副本各自持有一份）
+        self._branch_ref_cache = {}
+        # 分支名到完整引用名的索引（纯字符串，可在线程间共享）
+        self._branch_refnames = None
+        # 所有分支的最后提交ID
+        self._branch_tip_shas = set()
+        # 所有 (引用名, 最后提交ID) 的摘要，任一分支新建、删除或移动时都会变化
+        self._branch_tips_digest = None
+        # 各分支最后提交的作者，键为完整引用名
+        self._branch_ref_authors = {}
+        # 目标分支最近的合并提交，键为被合并的父提交ID
+        self._merge_by_parent = {}
+        # 读取合并提交索引失败时的错误信息，此时按分支查找得到的是兜底结果
+        self._merge_by_parent_error = None
+        # 项目路径（由远程仓库地址计算）
+        self._project_path = None
+        # 最近一次同步fetch是否成功（失败时继续使用本地已有的数据）
+        self.last_fetch_ok = True
+        # 共享的配置及同一次加载建立的查找索引（首次访问时由_load_config读取）
+        self._config = None
+        self._indexes = None
+    
+    @property
+    def config(self):
+        """配置（首次访问时读取）"""
+        if self._config is None:
+            self._load_config()
+        return self._config
+    
+    @property
+    def _config_indexes(self):
+        """配置的查找索引（与配置在同一次读取中取得，保证两者对应）"""
+        if self._config is None:
+            self._load_config()
+        return self._indexes
+    
+    @cached_property
+    def current_repo_config(self):
+        """当前仓库在配置中的条目（首次访问时识别）"""
         self._identify_repo_platform()
+        return self.__dict__['current_repo_config']
+    
+    @cached_property
+    def platform_config(self):
+        """当前仓库的平台配置（首次访问时识别）"""
+        self._identify_repo_platform()
+        return self.__dict__['platform_config']
+        
+    def _load_config(self):
+        """读取配置及其查找索引；配置文件变化后丢弃按旧配置识别的平台，使生成的链接使用最新的平台配置"""
+        config, indexes = get_cached_config_with_indexes()
+        if config is self._config:
+            return
+        self._config = config
+        self._indexes = indexes
+        for name in ('current_repo_config', 'platform_config'):
+            self.__dict__.pop(name, None)
+        self._project_path = None
         
-    def _is_remote_url(self, url):
+    @staticmethod
+    def _is_remote_url(url):
         """判断是否为远程仓库URL"""
         return url.startswith(('git@', 'https://', 'http://')) or '.git' in url
     
     def _identify_repo_platform(self):
         """识别当前仓库的平台配置"""
+        # 先确认使用最新配置（读取到新配置时会清除旧的识别结果，需在写入识别结果之前）
+        self._load_config()
+        # 直接写入实例属性，覆盖对应的延迟属性
+        self.current_repo_config = None
+        self.platform_config = None
         try:
             # 首先尝试从配置文件中的repositories列表匹配
-            for repo in self.config.get('repositories', []):
-                if repo.get('url') == self.repo_input:
-                    self.current_repo_config = repo
-                    platform_key = repo.get('platform')
-                    if platform_key and platform_key in self.config.get('platforms', {}):
-                        self.platform_config = self.config['platforms'][platform_key]
-                    return
+            repo = self._config_indexes['repo_by_url'].get(self.repo_input)
+            if repo is not None:
+                self.current_repo_config = repo
+                platform_key = repo.get('platform')
+                if platform_key and platform_key in self.config.get('platforms', {}):
+                    self.platform_config = self.config['platforms'][platform_key]
+                return
             
             # 如果没有在配置中找到，尝试根据URL自动识别平台
             self._auto_identify_platform()
@@ -275,15 +673,15 @@ class GitBranchChecker:
     def _auto_identify_platform(self):
         """根据URL自动识别平台"""
         try:
-            platforms = self.config.get('platforms', {})
+            # 按最长前缀优先匹配，避免短前缀（如 https://host/）覆盖带路径的前缀
+            for prefix, platform_info in self._config_indexes['platform_prefix_list']:
+                if self.repo_input.startswith(prefix):
+                    self.platform_config = platform_info
+                    return
             
-            for platform_key, platform_info in platforms.items():
-                ssh_prefix = platform_info.get('ssh_prefix', '')
-                https_prefix = platform_info.get('https_prefix', '')
-                
-                if (ssh_prefix and self.repo_input.startswith(ssh_prefix)) or \
-                   (https_prefix and self.repo_input.startswith(https_prefix)) or \
-                   platform_key in self.repo_input:
+            # 最后按平台标识是否出现在URL中匹配
+            for platform_key, platform_info in self.config.get('platforms', {}).items():
+                if platform_key in self.repo_input:
                     self.platform_config = platform_info
                     return
             
@@ -304,7 +702,7 @@ class GitBranchChecker:
             "https_prefix": "https://code.aliyun.com/"
         }
         
-    def connect_repo(self):
+    def connect_repo(self, force_fetch=False):
         """连接到Git仓库"""
         # 设置多个环境变量来解决编码问题
         os.environ['GIT_PYTHON_ENCODING'] = 'utf-8'
@@ -313,7 +711,7 @@ class GitBranchChecker:
         try:
             if self.is_remote:
                 # 处理远程仓库
-                return self._clone_or_fetch_remote()
+                return self._clone_or_fetch_remote(force_fetch)
             else:
                 # 处理本地仓库
                 if not os.path.exists(self.repo_input):
@@ -327,13 +725,63 @@ class GitBranchChecker:
         except Exception as e:
             return False, f"连接失败: {str(e)}"
     
-    def _clone_or_fetch_remote(self):
+    def _get_remote_local_path(self):
+        """获取远程仓库在temp_repos中的本地克隆路径"""
+        # 从URL提取仓库名
+        repo_name = self.repo_input.split('/')[-1].replace('.git', '')
+        return os.path.join(os.getcwd(), 'temp_repos', repo_name)
+    
+    def has_local_clone(self):
+        """远程仓库是否已经克隆到本地"""
+        return os.path.exists(self._get_remote_local_path())
+    
+    def list_remote_branches(self):
+        """通过 git ls-remote 获取远程仓库的分支列表（无需克隆），返回 (success, message, branches)
+        
+        ls-remote只返回分支名和最后提交ID，提交人等信息需要克隆后才能获取
+        """
+        try:
+            result = subprocess.run(['git', 'ls-remote', '--heads', self.repo_input],
+                                    capture_output=True, text=True, encoding='utf-8',
+                                    errors='replace', timeout=60)
+        except subprocess.TimeoutExpired:
+            return False, "获取远程分支超时", []
+        except Exception as e:
+            return False, f"获取远程分支失败: {str(e)}", []
+        
+        if result.returncode != 0:
+            error = result.stderr.strip()
+            if "Permission denied" in error or "authentication" in error.lower():
+                return False, "SSH认证失败，请确保您的SSH密钥已配置并有权限访问该仓库", []
+            return False, f"Git操作失败: {error}", []
+        
+        branches = []
+        for line in result.stdout.splitlines():
+            parts = line.split('\t', 1)
+            if len(parts) != 2 or not parts[1].startswith('refs/heads/'):
+                continue
+            sha, refname = parts
+            branches.append({
+                'name': refname[len('refs/heads/'):],
+                'type': 'remote',
+                'last_commit': sha[:8],
+                'last_commit_date': '-',
+                'author_name': '-',
+                'author_email': '-',
+                'commit_message': '-'
+            })
+        
+        branches.sort(key=lambda b: b['name'])
+        for i, branch in enumerate(branches, 1):
+            branch['index'] = i
+        
+        return True, "已获取远程分支列表，正在后台克隆仓库", branches
+    
+    def _clone_or_fetch_remote(self, force_fetch=False):
         """克隆或更新远程仓库"""
         try:
-            # 从URL提取仓库名
-            repo_name = self.repo_input.split('/')[-1].replace('.git', '')
-            temp_dir = os.path.join(os.getcwd(), 'temp_repos')
-            self.local_path = os.path.join(temp_dir, repo_name)
+            temp_dir = os.path.dirname(self._get_remote_local_path())
+            self.local_path = self._get_remote_local_path()
             
             # 创建临时目录
             os.makedirs(temp_dir, exist_ok=True)
@@ -342,30 +790,48 @@ class GitBranchChecker:
                 # 如果本地已存在，尝试更新
                 try:
                     self.repo = git.Repo(self.local_path)
+                except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
+                    # 本地仓库已损坏，删除重新克隆
+                    print(f"本地仓库已损坏，重新克隆: {self.local_path}")
+                    shutil.rmtree(self.local_path, ignore_errors=True)
+                    self.repo = None
+                
+                if self.repo is not None:
                     # 设置git配置以处理编码问题
-                    with self.repo.config_writer() as git_config:
-                        git_config.set_value("core", "quotepath", "false")
+                    try:
+                        self._ensure_quotepath_disabled()
+                    except Exception as e:
+                        print(f"设置仓库配置失败 (ignored): {e}")
+                    
+                    touch_temp_repo(self.local_path)
                     
-                    # 获取所有远程分支
-                    for remote in self.repo.remotes:
-                        try:
-                            # 使用更安全的 fetch 方式
-                            remote.fetch(verbose=False)
-                        except (UnicodeDecodeError, git.exc.GitCommandError) as e:
-                            # 忽略编码错误和命令错误，继续执行
-                            print(f"Fetch warning (ignored): {str(e)}")
-                            pass
+                    # 最近刚拉取过则直接复用
+                    fetch_age = time.time() - _repo_fetch_times.get(self.local_path, 0)
+                    if not force_fetch and fetch_age < FETCH_MIN_INTERVAL:
+                        return True, f"远程仓库已更新到本地: {self.local_path}"
+                    
+                    # 不久前拉取过：先使用本地数据返回，在后台拉取，下次请求即可看到最新分支
+                    if not force_fetch and fetch_age < BACKGROUND_FETCH_MAX_AGE:
+                        self._start_background_fetch()
+                        return True, f"远程仓库已更新到本地（正在后台拉取最新分支）: {self.local_path}"
+                    
+                    self._fetch_with_retry()
                     return True, f"远程仓库已更新到本地: {self.local_path}"
-                except:
-                    # 如果更新失败，删除重新克隆
-                    import shutil
-                    shutil.rmtree(self.local_path)
             
-            # 克隆仓库
-            self.repo = git.Repo.clone_from(self.repo_input, self.local_path)
+            # 克隆仓库 - 工具只读取提交元数据，使用不检出工作区的blobless部分克隆，
+            # 避免下载文件内容和写出工作区文件
+            clone_options = ['--filter=blob:none', '--no-checkout']
+            depth = self._get_clone_depth()
+            if depth:
+                # 浅克隆默认只拉取单个分支，这里需要所有分支
+                clone_options += [f'--depth={depth}', '--no-single-branch']
+            self.repo = git.Repo.clone_from(self.repo_input, self.local_path, multi_options=clone_options)
             # 设置git配置以处理编码问题
-            with self.repo.config_writer() as git_config:
-                git_config.set_value("core", "quotepath", "false")
+            self._ensure_quotepath_disabled()
+            _repo_fetch_times[self.local_path] = time.time()
+            
+            # 新克隆的仓库可能使temp_repos超出大小上限，在后台清理
+            threading.Thread(target=prune_temp_repos, args=(temp_dir, self.local_path), daemon=True).start()
             
             return True, f"远程仓库已克隆到本地: {self.local_path}"
             
@@ -378,6 +844,97 @@ class GitBranchChecker:
         except Exception as e:
             return False, f"克隆远程仓库失败: {str(e)}"
     
+    def _ensure_quotepath_disabled(self):
+        """设置 core.quotepath=false（中文路径不转义），已设置时不再重写 .git/config"""
+        try:
+            value = self.repo.config_reader('repository').get_value('core', 'quotepath')
+        except Exception:
+            value = None
+        if str(value).lower() != 'false':
+            with self.repo.config_writer() as git_config:
+                git_config.set_value("core", "quotepath", "false")
+    
+    def _start_background_fetch(self):
+        """在后台线程中拉取远程分支，同一本地仓库同时只运行一个后台拉取"""
+        with _background_fetch_lock:
+            if self.local_path in _background_fetching:
+                return
+            _background_fetching.add(self.local_path)
+        
+        def run():
+            try:
+                # 后台线程使用单独的Repo，避免与请求线程共用git进程
+                fetch_checker = copy.copy(self)
+                fetch_checker.repo = git.Repo(self.local_path)
+                fetch_checker._fetch_with_retry()
+            except Exception as e:
+                print(f"后台拉取远程分支失败: {e}")
+            finally:
+                with _background_fetch_lock:
+                    _background_fetching.discard(self.local_path)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _fetch_with_retry(self):
+        """拉取所有远程分支，网络错误时短暂等待后重试，仍失败则继续使用本地已有的数据
+        
+        同一本地仓库的fetch串行执行，正在进行的fetch（如后台fetch）结束后再开始
+        """
+        with _get_fetch_lock(self.local_path):
+            for delay in FETCH_RETRY_DELAYS + (None,):
+                try:
+                    # 一次fetch并行拉取所有远程仓库
+                    self.repo.git.fetch('--all', f'--jobs={self._get_fetch_jobs()}', '--no-tags',
+                                        *self._get_depth_options())
+                    _repo_fetch_times[self.local_path] = time.time()
+                    self.last_fetch_ok = True
+                    return True
+                except (UnicodeDecodeError, git.exc.GitCommandError) as e:
+                    # 认证失败重试也无法恢复
+                    if delay is None or "Permission denied" in str(e) or "authentication" in str(e).lower():
+                        # 忽略编码错误和命令错误，继续执行
+                        print(f"Fetch warning (ignored): {str(e)}")
+                        self.last_fetch_ok = False
+                        return False
+                    time.sleep(delay)
+    
+    def fetch_remote(self):
+        """同步拉取远程分支，本地仓库无需拉取"""
+        if not self.is_remote or self.repo is None:
+            return True
+        return self._fetch_with_retry()
+    
+    def _get_fetch_jobs(self):
+        """获取并行fetch的远程仓库数，可通过配置项 fetch_jobs 调小（如受限流的Git服务）"""
+        try:
+            jobs = int(self.config.get('fetch_jobs', FETCH_JOBS))
+        except (TypeError, ValueError):
+            return FETCH_JOBS
+        return max(jobs, 1)
+    
+    def _get_clone_depth(self):
+        """获取仓库配置的浅克隆深度（clone_depth），未配置时返回None表示完整历史
+        
+        浅克隆只包含最近的提交，合并时间早于该深度的分支会被判断为未合并
+        """
+        if not self.current_repo_config:
+            return None
+        try:
+            depth = int(self.current_repo_config.get('clone_depth') or 0)
+        except (TypeError, ValueError):
+            return None
+        return depth if depth > 0 else None
+    
+    def _get_depth_options(self):
+        """获取fetch时与浅克隆深度对应的参数"""
+        depth = self._get_clone_depth()
+        if depth:
+            return [f'--depth={depth}']
+        # 取消了深度配置的浅克隆仓库，补全完整历史
+        if os.path.exists(os.path.join(self.repo.git_dir, 'shallow')):
+            return ['--unshallow']
+        return []
+    
     def get_all_branches(self):
         """获取所有分支信息"""
         if not self.repo:
@@ -385,44 +942,55 @@ class GitBranchChecker:
         
         branches = []
         try:
-            # 获取本地分支
-            for branch in self.repo.branches:
-                commit = branch.commit
+            remote_names = [remote.name for remote in self.repo.remotes]
+            
+            # 一次 for-each-ref 读取所有分支的最后提交信息，避免逐个加载提交对象
+            output = self.repo.git.for_each_ref(
+                '--format=%(refname)%00%(objectname)%00%(committerdate:unix)%00'
+                '%(authorname)%00%(authoremail)%00%(contents:subject)',
+                'refs/heads/', 'refs/remotes/'
+            )
+            
+            local_refs = []
+            remote_refs = []
+            for line in output.split('\n'):
+                parts = line.split('\x00', 5)
+                if len(parts) < 6:
+                    continue
+                parsed = self._parse_branch_refname(parts[0], remote_names)
+                if not parsed:
+                    continue
+                branch_name, remote_name = parsed
+                if remote_name is None:
+                    local_refs.append((branch_name, 'local', parts))
+                else:
+                    remote_refs.append((branch_name, f'remote ({remote_name})', parts))
+            
+            # 本地分支名集合，用于快速去重
+            local_names = {name for name, _, _ in local_refs}
+            
+            for branch_name, branch_type, parts in local_refs + remote_refs:
+                # 避免重复显示已存在的本地分支
+                if branch_type != 'local' and branch_name in local_names:
+                    continue
+                _, hexsha, committed_date, author_name, author_email, subject = parts
+                try:
+                    committed_date = int(committed_date)
+                except ValueError:
+                    continue
                 branches.append({
-                    'name': branch.name,
-                    'type': 'local',
-                    'last_commit': commit.hexsha[:8],
-                    'last_commit_date': datetime.fromtimestamp(commit.committed_date).strftime('%Y-%m-%d %H:%M:%S'),
-                    'last_commit_timestamp': commit.committed_date,  # 用于排序
-                    'author_name': commit.author.name,
-                    'author_email': commit.author.email,
-                    'commit_message': commit.message.strip().split('\n')[0]
+                    'name': branch_name,
+                    'type': branch_type,
+                    'last_commit': hexsha[:8],
+                    'last_commit_date': format_timestamp(committed_date),
+                    'last_commit_timestamp': committed_date,  # 用于排序
+                    'author_name': author_name,
+                    'author_email': author_email.strip('<>'),
+                    'commit_message': subject
                 })
             
-            # 获取远程分支
-            for remote in self.repo.remotes:
-                for ref in remote.refs:
-                    if ref.name != f"{remote.name}/HEAD":
-                        branch_name = ref.name.replace(f"{remote.name}/", "")
-                        # 避免重复显示已存在的本地分支
-                        if not any(b['name'] == branch_name and b['type'] == 'local' for b in branches):
-                            try:
-                                commit = ref.commit
-                                branches.append({
-                                    'name': branch_name,
-                                    'type': f'remote ({remote.name})',
-                                    'last_commit': commit.hexsha[:8],
-                                    'last_commit_date': datetime.fromtimestamp(commit.committed_date).strftime('%Y-%m-%d %H:%M:%S'),
-                                    'last_commit_timestamp': commit.committed_date,  # 用于排序
-                                    'author_name': commit.author.name,
-                                    'author_email': commit.author.email,
-                                    'commit_message': commit.message.strip().split('\n')[0]
-                                })
-                            except:
-                                continue
-            
             # 按最后提交时间倒序排列
-            branches.sort(key=lambda x: x['last_commit_timestamp'], reverse=True)
+            branches.sort(key=itemgetter('last_commit_timestamp'), reverse=True)
             
             # 添加序号并移除排序用的时间戳字段
             for i, branch in enumerate(branches, 1):
@@ -434,66 +1002,132 @@ class GitBranchChecker:
         
         return branches
     
-    def check_branch_merge_status(self, keyword, target_branch):
-        """检查包含关键字的分支是否合并到目标分支"""
+    def _parse_branch_refname(self, refname, remote_names):
+        """将完整引用名解析为 (分支名, 远程仓库名)，本地分支的远程仓库名为None，
+        远程HEAD等非分支引用返回None"""
+        if refname.startswith('refs/heads/'):
+            return refname[len('refs/heads/'):], None
+        for remote_name in remote_names:
+            prefix = f'refs/remotes/{remote_name}/'
+            if refname.startswith(prefix):
+                branch_name = refname[len(prefix):]
+                if branch_name == 'HEAD':
+                    return None
+                return branch_name, remote_name
+        return None
+    
+    def _load_branch_refnames(self):
+        """读取所有分支名到完整引用名的映射，同名分支本地优先，其次按远程仓库顺序"""
+        remote_names = [remote.name for remote in self.repo.remotes]
+        output = self.repo.git.for_each_ref(
+            '--format=%(objectname)%00%(refname)%00%(authorname)%00%(authoremail)',
+            'refs/heads/', 'refs/remotes/'
+        )
+        
+        local_refnames = {}
+        remote_refnames = {name: {} for name in remote_names}
+        tip_shas = set()
+        ref_tips = []
+        ref_authors = {}
+        for line in output.split('\n'):
+            parts = line.split('\x00', 3)
+            if len(parts) < 4:
+                continue
+            sha, refname, author_name, author_email = parts
+            tip_shas.add(sha)
+            ref_tips.append(f'{refname} {sha}')
+            ref_authors[refname] = (author_name, author_email.strip('<>'))
+            parsed = self._parse_branch_refname(refname, remote_names)
+            if not parsed:
+                continue
+            branch_name, remote_name = parsed
+            if remote_name is None:
+                local_refnames[branch_name] = refname
+            else:
+                remote_refnames[remote_name][branch_name] = refname
+        
+        refnames = {}
+        for remote_name in reversed(remote_names):
+            refnames.update(remote_refnames[remote_name])
+        refnames.update(local_refnames)
+        
+        self._branch_refnames = refnames
+        self._branch_tip_shas = tip_shas
+        self._branch_tips_digest = hashlib.sha1('\n'.join(sorted(ref_tips)).encode()).hexdigest()
+        self._branch_ref_authors = ref_authors
+        return refnames
+    
+    def _get_all_branch_names(self):
+        """获取所有分支名（本地和远程，去重）"""
+        return set(self._load_branch_refnames())
+    
+    def _find_keyword_branches(self, keyword):
+        """查找包含任一关键字（逗号分隔）的分支名"""
+        # 获取所有分支名（本地和远程，已去重）
+        all_branches = self._get_all_branch_names()
+        
+        # 处理多个关键字（用逗号分隔）
+        keywords = [k.strip() for k in keyword.split(',') if k.strip()]
+        
+        # 过滤包含任一关键字的分支（只有一个关键字时省去内层循环）
+        if len(keywords) == 1:
+            kw = keywords[0]
+            return [branch for branch in all_branches if kw in branch]
+        return [branch for branch in all_branches if any(kw in branch for kw in keywords)]
+    
+    def iter_branch_merge_status(self, keyword, target_branch):
+        """逐个产出包含关键字的分支的合并检查结果（按检查完成的顺序）"""
         if not self.repo:
-            return []
+            return
+        
+        # 获取GitLab基础URL和项目路径（检查器在缓存期内复用，先确认配置没有变化）
+        self._load_config()
+        gitlab_base_url = self._get_gitlab_base_url()
+        project_path = self._get_project_path()
+        
+        # 每次检查都重新读取分支引用，引用缓存只在本次检查内有效
+        self._branch_ref_cache = {}
+        keyword_branches = self._find_keyword_branches(keyword)
+        if not keyword_branches:
+            return
+        
+        # 目标分支对所有分支都相同，只解析一次
+        target_ref = self._get_branch_ref(target_branch)
+        target_hex = target_ref.commit.hexsha if target_ref else None
+        
+        # 目标分支和所有分支都没有变化时，直接返回上次的检查结果；
+        # 缓存的合并信息只由提交决定，链接相关的平台字段按当前配置重新填充
+        cache_key = None
+        if target_hex:
+            cache_key = (self.repo.git_dir, keyword, target_branch, target_hex, self._branch_tips_digest)
+            with _merge_result_cache_lock:
+                cached_results = _merge_result_cache.get(cache_key)
+                if cached_results is not None:
+                    _merge_result_cache.move_to_end(cache_key)
+            if cached_results is not None:
+                for result in cached_results:
+                    yield dict(result, gitlab_url=gitlab_base_url, project_path=project_path,
+                               platform_config=self.platform_config)
+                return
+            self._prepare_batch_merge_data(target_hex)
         
+        # 每个分支的检查都是git子进程调用（IO密集），使用线程池并行执行
         results = []
+        executor = ThreadPoolExecutor(max_workers=min(MAX_CHECK_WORKERS, len(keyword_branches)))
         try:
-            # 获取GitLab基础URL和项目路径
-            gitlab_base_url = self._get_gitlab_base_url()
-            project_path = self._get_project_path()
-            
-            # 获取所有分支（本地和远程）获取所有分支
-            all_branches = []
-            
-            # 本地分支
-            for branch in self.repo.branches:
-                all_branches.append(branch.name)
-            
-            # 远程分支
-            for remote in self.repo.remotes:
-                for ref in remote.refs:
-                    if ref.name != f"{remote.name}/HEAD":
-                        branch_name = ref.name.replace(f"{remote.name}/", "")
-                        all_branches.append(branch_name)
-            
-            # 处理多个关键字（用逗号分隔）
-            keywords = [k.strip() for k in keyword.split(',') if k.strip()]
-            
-            # 过滤包含任一关键字的分支
-            keyword_branches = []
-            for branch in set(all_branches):
-                for kw in keywords:
-                    if kw in branch:
-                        keyword_branches.append(branch)
-                        break  # 找到一个匹配的关键字就跳出
-            
-            for branch_name in keyword_branches:
+            futures = {
+                executor.submit(self._check_single_branch, branch_name, target_branch,
+                                gitlab_base_url, project_path, target_hex): branch_name
+                for branch_name in keyword_branches
+            }
+            for future in as_completed(futures):
+                branch_name = futures[future]
                 try:
-                    # 检查分支是否存在于目标分支的历史中
-                    merge_info = self.check_merge_info(branch_name, target_branch)
-                    
-                    # 获取分支的最后提交人信息
-                    author_info = self.get_branch_author_info(branch_name)
-                    
-                    results.append({
-                        'branch_name': branch_name,
-                        'is_merged': merge_info['is_merged'],
-                        'merge_date': merge_info['merge_date'],
-                        'merge_commit': merge_info['merge_commit'],
-                        'merge_author': merge_info.get('merge_author', '未知'),
-                        'author_name': author_info['author_name'],
-                        'author_email': author_info['author_email'],
-                        'gitlab_url': gitlab_base_url,
-                        'project_path': project_path,
-                        'platform_config': self.platform_config,
-                        'mr_id': merge_info.get('mr_id'),
-                        'commit_hash': merge_info.get('commit_hash')
-                    })
+                    result = future.result()
                 except Exception as e:
-                    results.append({
+                    # 出错的结果不缓存
+                    cache_key = None
+                    yield {
                         'branch_name': branch_name,
                         'is_merged': False,
                         'merge_date': None,
@@ -501,60 +1135,112 @@ class GitBranchChecker:
                         'author_name': None,
                         'author_email': None,
                         'error': str(e)
-                    })
+                    }
+                    continue
+                if result.get('error'):
+                    # 合并信息检查出错时返回的是兜底结果，不缓存
+                    cache_key = None
+                results.append(result)
+                yield dict(result)
+        finally:
+            # 调用方提前停止迭代时（如客户端断开），取消尚未开始的检查
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        # 只缓存完整完成的检查
+        if cache_key is not None:
+            with _merge_result_cache_lock:
+                _merge_result_cache[cache_key] = results
+                _merge_result_cache.move_to_end(cache_key)
+                while len(_merge_result_cache) > MERGE_RESULT_CACHE_SIZE:
+                    _merge_result_cache.popitem(last=False)
+    
+    def check_branch_merge_status(self, keyword, target_branch):
+        """检查包含关键字的分支是否合并到目标分支"""
+        if not self.repo:
+            return []
         
+        results = []
+        try:
+            for result in self.iter_branch_merge_status(keyword, target_branch):
+                results.append(result)
         except Exception as e:
             print(f"检查分支合并状态时出错: {e}")
         
         # 按合并日期倒序排序（已合并的在前，未合并的在后）
         def sort_key(result):
             if result.get('is_merged') and result.get('merge_date'):
-                try:
-                    # 将日期字符串转换为datetime对象用于排序
-                    return (1, datetime.strptime(result['merge_date'], '%Y-%m-%d %H:%M:%S'))
-                except:
-                    return (1, datetime.min)  # 如果日期解析失败，放在已合并的最后
+                # 日期字符串为定长格式，直接按字符串比较即可
+                return (1, result['merge_date'])
             else:
-                return (0, datetime.min)  # 未合并的放在最后
+                return (0, '')  # 未合并的放在最后
         
         results.sort(key=sort_key, reverse=True)
         
         return results
     
+    def _get_thread_checker(self):
+        """获取当前线程专用的检查器副本
+        
+        GitPython读取提交对象时复用常驻的 git cat-file 进程，多个线程共享同一个Repo并不安全，
+        因此每个工作线程各自打开一份Repo
+        """
+        checker = getattr(self._thread_local, 'checker', None)
+        if checker is None:
+            checker = copy.copy(self)
+            checker.repo = git.Repo(self.repo.git_dir)
+            checker._branch_ref_cache = {}
+            self._thread_local.checker = checker
+        return checker
+    
+    def _check_single_branch(self, branch_name, target_branch, gitlab_base_url, project_path, target_hex=None):
+        """检查单个分支的合并状态（在线程池中执行）"""
+        checker = self._get_thread_checker()
+        
+        # 检查分支是否存在于目标分支的历史中
+        merge_info = checker.check_merge_info(branch_name, target_branch, target_hex)
+        
+        # 获取分支的最后提交人信息
+        author_info = checker.get_branch_author_info(branch_name)
+        
+        result = {
+            'branch_name': branch_name,
+            'is_merged': merge_info['is_merged'],
+            'merge_date': merge_info['merge_date'],
+            'merge_commit': merge_info['merge_commit'],
+            'merge_author': merge_info.get('merge_author', '未知'),
+            'author_name': author_info['author_name'],
+            'author_email': author_info['author_email'],
+            'gitlab_url': gitlab_base_url,
+            'project_path': project_path,
+            'platform_config': self.platform_config,
+            'mr_id': merge_info.get('mr_id'),
+            'commit_hash': merge_info.get('commit_hash')
+        }
+        if merge_info.get('error'):
+            result['error'] = merge_info['error']
+        return result
+    
     def get_branch_author_info(self, branch_name):
-        """获取分支的最后提交人信息"""
-        try:
-            # 尝试获取分支的最后一次提交
-            branch_commit = None
-            try:
-                branch_commit = self.repo.heads[branch_name].commit
-            except:
-                # 尝试远程分支
-                for remote in self.repo.remotes:
-                    try:
-                        branch_commit = getattr(remote.refs, branch_name).commit
-                        break
-                    except:
-                        continue
-            
-            if branch_commit:
-                return {
-                    'author_name': branch_commit.author.name,
-                    'author_email': branch_commit.author.email
-                }
-            else:
-                return {'author_name': '未知', 'author_email': '未知'}
-                
-        except Exception as e:
+        """获取分支的最后提交人信息（读取分支索引时已一并获取，无需再读取提交对象）"""
+        if self._branch_refnames is None:
+            self._load_branch_refnames()
+        author = self._branch_ref_authors.get(self._branch_refnames.get(branch_name))
+        if not author:
             return {'author_name': '未知', 'author_email': '未知'}
+        return {'author_name': author[0], 'author_email': author[1]}
     
-    def check_merge_info(self, source_branch, target_branch):
-        """检查具体的合并信息 - 优化版本"""
+    def check_merge_info(self, source_branch, target_branch, target_hex=None):
+        """检查具体的合并信息 - 优化版本
+        
+        target_hex 为调用方预先解析好的目标分支提交ID，未提供时按分支名查找
+        """
         try:
-            # 获取目标分支引用
-            target_ref = self._get_branch_ref(target_branch)
-            if not target_ref:
-                return {'is_merged': False, 'merge_date': None, 'merge_commit': None}
+            # 获取目标分支的提交ID
+            if not target_hex:
+                target_ref = self._get_branch_ref(target_branch)
+                if not target_ref:
+                    return {'is_merged': False, 'merge_date': None, 'merge_commit': None}
+                target_hex = target_ref.commit.hexsha
             
             # 获取源分支的最后一次提交ID
             source_commit = self._get_branch_last_commit(source_branch)
@@ -562,106 +1248,183 @@ class GitBranchChecker:
                 return {'is_merged': False, 'merge_date': None, 'merge_commit': None}
             
             source_commit_id = source_commit.hexsha
-            print(f"源分支 {source_branch} 最后提交ID: {source_commit_id[:8]}")
+            app.logger.debug(f"源分支 {source_branch} 最后提交ID: {source_commit_id[:8]}")
+            
+            # 提交历史不可变，相同的源/目标提交可以直接复用之前的检查结果
+            cache_key = (self.repo.git_dir, source_branch, source_commit_id, target_hex)
+            with _merge_info_cache_lock:
+                if cache_key in _merge_info_cache:
+                    _merge_info_cache.move_to_end(cache_key)
+                    return dict(_merge_info_cache[cache_key])
             
             # 使用git命令直接查找提交是否在目标分支中
             try:
-                # 使用 git merge-base 检查是否已合并
-                merge_base = self.repo.git.merge_base(source_commit_id, target_ref.commit.hexsha)
-                
-                # 如果merge-base等于源分支的提交，说明已经合并
-                if merge_base == source_commit_id:
-                    # 查找包含此提交的合并提交
-                    merge_info = self._find_merge_commit_efficient(source_commit_id, target_ref, source_branch)
-                    if merge_info:
-                        return merge_info
-                    
-                    # 如果没找到合并提交，可能是fast-forward或直接推送
-                    return {
-                        'is_merged': True,
-                        'merge_date': datetime.fromtimestamp(source_commit.committed_date).strftime('%Y-%m-%d %H:%M:%S'),
-                        'merge_commit': f"{source_commit_id[:8]} (直接合并)",
-                        'merge_author': source_commit.author.name,
-                        'mr_id': None,
-                        'commit_hash': source_commit_id[:8]
-                    }
-                else:
-                    return {'is_merged': False, 'merge_date': None, 'merge_commit': None}
-                    
+                merge_info = self._compute_merge_info(source_commit, source_branch, target_hex)
             except Exception as e:
-                print(f"Git命令执行失败: {e}")
-                return {'is_merged': False, 'merge_date': None, 'merge_commit': None}
+                app.logger.warning(f"Git命令执行失败: {e}")
+                return {'is_merged': False, 'merge_date': None, 'merge_commit': None, 'error': str(e)}
+            
+            # 查找过程中git命令出错时得到的是兜底结果，不缓存
+            if not merge_info.get('error'):
+                with _merge_info_cache_lock:
+                    _merge_info_cache[cache_key] = dict(merge_info)
+                    if len(_merge_info_cache) > MERGE_INFO_CACHE_SIZE:
+                        _merge_info_cache.popitem(last=False)
+            return merge_info
                 
         except Exception as e:
-            print(f"检查合并信息时出错: {e}")
+            app.logger.warning(f"检查合并信息时出错: {e}")
+            return {'is_merged': False, 'merge_date': None, 'merge_commit': None, 'error': str(e)}
+    
+    def _compute_merge_info(self, source_commit, source_branch, target_hex):
+        """计算源提交合并到目标提交的信息"""
+        source_commit_id = source_commit.hexsha
+        
+        # 使用 git merge-base --is-ancestor 检查是否已合并
+        # 源分支的提交是目标分支的祖先，说明已经合并
+        if not self._is_ancestor(source_commit_id, target_hex):
             return {'is_merged': False, 'merge_date': None, 'merge_commit': None}
+        
+        # 先查找直接合并了此提交的合并提交（批量预取），再按分支名搜索包含此提交的合并提交
+        merge_commit = self._merge_by_parent.get(source_commit_id)
+        if merge_commit:
+            return self._build_merge_commit_info(*merge_commit)
+        merge_info, error = self._find_merge_commit_efficient(source_commit_id, target_hex, source_branch)
+        if not merge_info:
+            # 如果没找到合并提交，可能是fast-forward或直接推送
+            merge_info = {
+                'is_merged': True,
+                'merge_date': format_timestamp(source_commit.committed_date),
+                'merge_commit': f"{source_commit_id[:8]} (直接合并)",
+                'merge_author': source_commit.author.name,
+                'mr_id': None,
+                'commit_hash': source_commit_id[:8]
+            }
+        # 查找过程中git命令出错时，结果只是兜底答案，标记错误
+        error = error or self._merge_by_parent_error
+        if error:
+            merge_info['error'] = error
+        return merge_info
+    
+    def _is_ancestor(self, source_commit_id, target_commit_id):
+        """判断源提交是否为目标提交的祖先（带缓存）
+        
+        merge-base --is-ancestor 找到结果即可提前结束，不需要计算完整的merge-base
+        """
+        key = (source_commit_id, target_commit_id)
+        if key not in self._ancestor_cache:
+            try:
+                self.repo.git.merge_base('--is-ancestor', source_commit_id, target_commit_id)
+                self._ancestor_cache[key] = True
+            except git.exc.GitCommandError as e:
+                # 退出码1表示不是祖先，其他退出码为真正的错误
+                if e.status != 1:
+                    raise
+                self._ancestor_cache[key] = False
+        return self._ancestor_cache[key]
     
     def _get_branch_ref(self, branch_name):
-        """获取分支引用"""
-        try:
-            # 先尝试本地分支
-            return self.repo.heads[branch_name]
-        except:
-            # 再尝试远程分支
-            for remote in self.repo.remotes:
-                try:
-                    return getattr(remote.refs, branch_name)
-                except:
-                    continue
+        """获取分支引用（带缓存）"""
+        if branch_name not in self._branch_ref_cache:
+            self._branch_ref_cache[branch_name] = self._lookup_branch_ref(branch_name)
+        return self._branch_ref_cache[branch_name]
+    
+    def _lookup_branch_ref(self, branch_name):
+        """查找分支引用（本地分支优先，其次按远程仓库顺序查找）"""
+        if self._branch_refnames is None:
+            self._load_branch_refnames()
+        refname = self._branch_refnames.get(branch_name)
+        if not refname:
             return None
+        return git.Reference(self.repo, refname)
     
     def _get_branch_last_commit(self, branch_name):
         """获取分支的最后一次提交"""
         branch_ref = self._get_branch_ref(branch_name)
         return branch_ref.commit if branch_ref else None
     
-    def _find_merge_commit_efficient(self, source_commit_id, target_ref, source_branch):
-        """高效查找合并提交"""
+    def _build_merge_commit_info(self, commit_hash, timestamp, author, message):
+        """根据合并提交的信息构造合并结果"""
+        # 尝试从提交消息中提取Merge Request ID
+        mr_id = self._extract_merge_request_id(message)
+        if mr_id:
+            merge_commit_display = f"{mr_id} ({commit_hash[:8]})"
+        else:
+            merge_commit_display = f"{commit_hash[:8]} (合并提交)"
+        
+        return {
+            'is_merged': True,
+            'merge_date': format_timestamp(timestamp),
+            'merge_commit': merge_commit_display,
+            'merge_author': author,
+            'mr_id': mr_id,
+            'commit_hash': commit_hash[:8]
+        }
+    
+    def _prepare_batch_merge_data(self, target_hex):
+        """批量预取所有分支的合并状态
+        
+        一次 for-each-ref --merged 得到所有已合并到目标提交的分支，预先填充祖先关系缓存；
+        一次 git log 读取目标分支最近的合并提交，按被合并的父提交建立索引。
+        这样大多数分支不再需要单独执行git命令
+        """
+        try:
+            merged_output = self.repo.git.for_each_ref(
+                '--merged', target_hex, '--format=%(objectname)', 'refs/heads/', 'refs/remotes/'
+            )
+            merged_shas = set(merged_output.split())
+            for sha in self._branch_tip_shas:
+                self._ancestor_cache[(sha, target_hex)] = sha in merged_shas
+        except Exception as e:
+            app.logger.warning(f"批量检查合并状态失败: {e}")
+        
+        merge_by_parent = {}
+        self._merge_by_parent_error = None
+        try:
+            log_output = self.repo.git.log(
+                target_hex,
+                '--merges',
+                '--format=%H%x00%ct%x00%an%x00%P%x00%s',
+                '-n', str(MERGE_SCAN_LIMIT)
+            )
+            for line in log_output.split('\n'):
+                parts = line.split('\x00', 4)
+                if len(parts) < 5:
+                    continue
+                commit_hash, timestamp, author, parents, message = parts
+                # 输出从新到旧，同一父提交保留最早的合并提交（即真正合并该提交的那次）
+                for parent in parents.split()[1:]:
+                    merge_by_parent[parent] = (commit_hash, timestamp, author, message)
+        except Exception as e:
+            app.logger.warning(f"读取合并提交失败: {e}")
+            self._merge_by_parent_error = str(e)
+        self._merge_by_parent = merge_by_parent
+    
+    def _find_merge_commit_efficient(self, source_commit_id, target_hex, source_branch):
+        """高效查找合并提交，返回 (合并信息, 错误信息)，未找到时合并信息为None，git命令都成功时错误信息为None"""
         try:
             # 使用git log查找包含特定提交的合并提交
-            # 限制搜索范围，只查看最近的合并提交
+            # --ancestry-path 只保留源提交到目标分支之间的提交，即包含源提交的合并提交，
+            # 无需再对每个候选提交单独执行 merge-base --is-ancestor
+            # 只使用最近的一个合并提交，-n 1 让git找到后立即停止，不必输出和解析多余的记录
             log_output = self.repo.git.log(
-                target_ref.commit.hexsha,
+                f'{source_commit_id}..{target_hex}',
+                '--ancestry-path',
                 '--merges',
                 '--grep=' + source_branch,
-                '--format=%H|%ct|%an|%s',
-                '-n', '50'  # 只查看最近50个合并提交
+                '--format=%H%x00%ct%x00%an%x00%s',
+                '-n', '1'
             )
             
-            if log_output:
-                for line in log_output.split('\n'):
-                    if line.strip():
-                        parts = line.split('|', 3)
-                        if len(parts) >= 4:
-                            commit_hash, timestamp, author, message = parts
-                            
-                            # 检查这个合并提交是否包含我们的源提交
-                            try:
-                                # 使用git命令检查源提交是否在这个合并提交的历史中
-                                self.repo.git.merge_base('--is-ancestor', source_commit_id, commit_hash)
-                                
-                                # 尝试从提交消息中提取Merge Request ID
-                                mr_id = self._extract_merge_request_id(message)
-                                if mr_id:
-                                    merge_commit_display = f"{mr_id} ({commit_hash[:8]})"
-                                else:
-                                    merge_commit_display = f"{commit_hash[:8]} (合并提交)"
-                                
-                                return {
-                                    'is_merged': True,
-                                    'merge_date': datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M:%S'),
-                                    'merge_commit': merge_commit_display,
-                                    'merge_author': author,
-                                    'mr_id': mr_id,
-                                    'commit_hash': commit_hash[:8]
-                                }
-                            except:
-                                continue
+            parts = log_output.strip('\n').split('\x00', 3)
+            if len(parts) == 4:
+                commit_hash, timestamp, author, message = parts
+                return self._build_merge_commit_info(commit_hash, timestamp, author, message), None
             
             # 如果没找到合并提交，尝试查找直接包含源提交的提交
             try:
                 log_output = self.repo.git.log(
-                    target_ref.commit.hexsha,
+                    target_hex,
                     '--format=%H|%ct|%an',
                     '--grep=' + source_commit_id[:8],
                     '-n', '10'
@@ -676,20 +1439,20 @@ class GitBranchChecker:
                                 if commit_hash == source_commit_id:
                                     return {
                                         'is_merged': True,
-                                        'merge_date': datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M:%S'),
+                                        'merge_date': format_timestamp(timestamp),
                                         'merge_commit': f"{commit_hash[:8]} (直接提交)",
                                         'merge_author': author,
                                         'mr_id': None,
                                         'commit_hash': commit_hash[:8]
-                                    }
-            except:
-                pass
+                                    }, None
+            except Exception as e:
+                return None, str(e)
             
-            return None
+            return None, None
             
         except Exception as e:
-            print(f"查找合并提交时出错: {e}")
-            return None
+            app.logger.warning(f"查找合并提交时出错: {e}")
+            return None, str(e)
     
     def _get_gitlab_base_url(self):
         """获取平台基础URL"""
@@ -698,7 +1461,13 @@ class GitBranchChecker:
         return "https://gitlab.com"
     
     def _get_project_path(self):
-        """获取项目路径，用于生成完整的链接"""
+        """获取项目路径，用于生成完整的链接（远程地址不变，首次计算后缓存）"""
+        if self._project_path is None:
+            self._project_path = self._compute_project_path()
+        return self._project_path
+    
+    def _compute_project_path(self):
+        """根据远程仓库地址计算项目路径"""
         try:
             if not self.platform_config:
                 return ""
@@ -726,49 +1495,168 @@ class GitBranchChecker:
     
     def _extract_merge_request_id(self, commit_message):
         """从提交消息中提取Merge Request ID"""
-        import re
-        
-        # 常见的MR ID模式
-        patterns = [
-            r'merge request !(\d+)',  # GitLab: merge request !123
-            r'!(\d+)',                # GitLab: !123
-            r'pull request #(\d+)',   # GitHub: pull request #123
-            r'#(\d+)',                # GitHub: #123
-            r'PR (\d+)',              # Azure DevOps: PR 123
-            r'pr (\d+)',              # Azure DevOps: pr 123
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, commit_message, re.IGNORECASE)
+        for pattern, prefix in MR_ID_PATTERNS:
+            match = pattern.search(commit_message)
             if match:
-                mr_number = match.group(1)
-                # 根据模式返回相应的格式
-                if 'pull request' in pattern or '#' in pattern:
-                    return f"#{mr_number}"
-                elif 'PR' in pattern or 'pr' in pattern:
-                    return f"PR {mr_number}"
-                else:
-                    return f"!{mr_number}"
+                return f"{prefix}{match.group(1)}"
         
         return None
 
 
+# 已连接仓库的检查器缓存（LRU），键为 repo_input
+_checker_cache = OrderedDict()
+_checker_cache_lock = threading.Lock()
+
+def _evict_checkers(keep):
+    """检查器缓存超出上限时，关闭并移除最久未使用且当前没有请求在用的检查器（需持有_checker_cache_lock）
+    
+    keep 为当前请求正在使用的仓库，即使它最久未使用也不移除
+    """
+    for cached_input in list(_checker_cache):
+        if len(_checker_cache) <= CHECKER_CACHE_SIZE:
+            break
+        entry = _checker_cache[cached_input]
+        if cached_input == keep or entry['lock'].locked():
+            continue
+        del _checker_cache[cached_input]
+        if entry['checker'] is not None and entry['checker'].repo is not None:
+            # 释放GitPython常驻的git cat-file进程
+            entry['checker'].repo.close()
+
+def _acquire_checkers_for_path(path):
+    """锁定缓存中使用指定本地克隆的所有检查器，返回已加锁的条目列表（调用方负责释放），
+    有请求正在使用时返回None"""
+    path = os.path.abspath(path)
+    with _checker_cache_lock:
+        entries = [entry for repo_input, entry in _checker_cache.items()
+                   if GitBranchChecker._is_remote_url(repo_input)
+                   and os.path.abspath(GitBranchChecker(repo_input)._get_remote_local_path()) == path]
+    locked = []
+    for entry in entries:
+        if not entry['lock'].acquire(blocking=False):
+            for locked_entry in locked:
+                locked_entry['lock'].release()
+            return None
+        locked.append(entry)
+    return locked
+
+def _evict_checker_entries(entries):
+    """从缓存中移除指定的检查器条目并关闭仓库（调用方需持有各条目的锁）"""
+    with _checker_cache_lock:
+        for repo_input, entry in list(_checker_cache.items()):
+            if any(entry is evicted for evicted in entries):
+                del _checker_cache[repo_input]
+    for entry in entries:
+        if entry['checker'] is not None and entry['checker'].repo is not None:
+            entry['checker'].repo.close()
+        entry['checker'] = None
+
+@contextmanager
+def connected_checker(repo_input, refresh=False, fetch=False):
+    """获取已连接仓库的检查器，返回 (checker, success, message)
+    
+    缓存有效期内复用已打开的仓库，避免每次请求都重新打开仓库和拉取远程分支；
+    同一仓库的请求串行执行，避免并发fetch和读取冲突。
+    fetch=True时总是同步拉取远程分支（合并检查使用），不复用缓存期内的旧数据，也不改为后台拉取
+    """
+    with _checker_cache_lock:
+        entry = _checker_cache.get(repo_input)
+        if entry is None:
+            entry = {'checker': None, 'message': None, 'connected_at': 0, 'lock': threading.Lock()}
+            _checker_cache[repo_input] = entry
+        _checker_cache.move_to_end(repo_input)
+        _evict_checkers(keep=repo_input)
+    
+    with entry['lock']:
+        if refresh or entry['checker'] is None or time.time() - entry['connected_at'] >= CHECKER_CACHE_TTL:
+            checker = GitBranchChecker(repo_input)
+            success, message = checker.connect_repo(force_fetch=refresh or fetch)
+            if not success:
+                entry['checker'] = None
+                yield checker, False, message
+                return
+            entry.update(checker=checker, message=message, connected_at=time.time())
+        elif fetch:
+            entry['checker'].fetch_remote()
+        
+        yield entry['checker'], True, entry['message']
+
+def warm_checker(repo_input):
+    """在后台连接仓库（克隆远程仓库），后续请求可直接复用"""
+    try:
+        with connected_checker(repo_input) as (checker, success, message):
+            if not success:
+                print(f"后台连接仓库失败: {message}")
+    except Exception as e:
+        print(f"后台连接仓库时出错: {e}")
+
+def run_connect(repo_input, refresh=False):
+    """连接仓库并获取分支列表，返回 (success, message, branches, local_path)"""
+    # 尚未克隆的远程仓库：先用ls-remote快速返回分支列表，同时在后台克隆
+    checker = GitBranchChecker(repo_input)
+    if checker.is_remote and not checker.has_local_clone():
+        success, message, branches = checker.list_remote_branches()
+        if success:
+            threading.Thread(target=warm_checker, args=(repo_input,), daemon=True).start()
+        return success, message, branches, None
+    
+    with connected_checker(repo_input, refresh) as (checker, success, message):
+        if not success:
+            return False, message, [], None
+        return True, message, checker.get_all_branches(), checker.local_path
+
+def validate_merge_check_input(repo_input, keyword, target_branch):
+    """在连接仓库前检查请求参数，明显无效的请求直接返回错误信息，参数有效时返回None"""
+    if not all(isinstance(value, str) for value in (repo_input, keyword, target_branch)):
+        return '请求数据格式错误'
+    if not all([repo_input, keyword, target_branch]):
+        return '请填写所有必要信息'
+    if len(keyword) > MAX_KEYWORD_LENGTH:
+        return f'关键字过长（最多{MAX_KEYWORD_LENGTH}个字符）'
+    if target_branch.startswith('-') or any(c.isspace() for c in target_branch):
+        return '目标分支名称无效'
+    # 本地仓库路径不存在时无需尝试连接
+    if not GitBranchChecker._is_remote_url(repo_input) and not os.path.isdir(repo_input):
+        return '仓库路径不存在'
+    return None
+
+def validate_platform_config(platform_config):
+    """检查平台配置的必填字段，有效时返回None，否则返回错误信息"""
+    if not isinstance(platform_config, dict):
+        return '平台配置格式错误'
+    for field in PLATFORM_REQUIRED_FIELDS:
+        value = platform_config.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f'平台配置字段 "{field}" 不能为空'
+    return None
+
+def run_merge_check(repo_input, keyword, target_branch, refresh=False):
+    """连接仓库并检查分支合并状态，返回 (success, message, results)
+    
+    检查前同步拉取远程分支，拉取失败时仍使用本地数据检查，message中给出提示
+    """
+    with connected_checker(repo_input, refresh, fetch=True) as (checker, success, message):
+        if not success:
+            return False, message, []
+        if not checker.last_fetch_ok:
+            message = FETCH_FAILED_MESSAGE
+        return True, message, checker.check_branch_merge_status(keyword, target_branch)
+
+
 @app.route('/')
 def index():
     try:
         print(f"🌐 访问主页")
         return render_template('index.html')
     except Exception as e:
-        print(f"❌ 渲染模板时发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception(f"❌ 渲染模板时发生错误: {e}")
         return f"渲染模板失败: {str(e)}", 500
 
 @app.route('/api/config')
 def get_config():
     """获取配置的仓库列表"""
     try:
-        config = load_config()
+        config = get_cached_config()
         return jsonify({
             'success': True,
             'repositories': config.get('repositories', []),
@@ -785,8 +1673,8 @@ def get_config():
 def save_config_api():
     """保存配置"""
     try:
-        data = request.json
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'success': False, 'message': '请求数据格式错误'})
         
         # 验证配置数据格式
@@ -805,8 +1693,8 @@ def save_config_api():
 def add_repository():
     """添加仓库配置"""
     try:
-        data = request.json
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'success': False, 'message': '请求数据格式错误'})
         
         name = data.get('name', '').strip()
@@ -870,8 +1758,8 @@ def delete_repository(index):
 def add_platform():
     """添加平台配置"""
     try:
-        data = request.json
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'success': False, 'message': '请求数据格式错误'})
         
         platform_key = data.get('key', '').strip()
@@ -880,10 +1768,9 @@ def add_platform():
         if not platform_key:
             return jsonify({'success': False, 'message': '平台标识不能为空'})
         
-        required_fields = ['name', 'base_url', 'merge_request_path', 'commit_path', 'ssh_prefix', 'https_prefix']
-        for field in required_fields:
-            if field not in platform_config or not platform_config[field].strip():
-                return jsonify({'success': False, 'message': f'平台配置字段 "{field}" 不能为空'})
+        error_message = validate_platform_config(platform_config)
+        if error_message:
+            return jsonify({'success': False, 'message': error_message})
         
         config = load_config()
         
@@ -901,10 +1788,10 @@ def add_platform():
         return jsonify({'success': False, 'message': f'添加失败: {str(e)}'})
 
 @app.route('/api/connect', methods=['POST'])
-def connect_repo():
+async def connect_repo():
     try:
-        data = request.json
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'success': False, 'message': '请求数据格式错误'})
             
         repo_input = data.get('repo_input', '')
@@ -912,163 +1799,184 @@ def connect_repo():
         if not repo_input:
             return jsonify({'success': False, 'message': '请输入仓库路径或URL'})
         
-        checker = GitBranchChecker(repo_input)
-        success, message = checker.connect_repo()
+        refresh = request.args.get('refresh') == '1'
+        # git操作是阻塞的，放到线程中执行
+        success, message, branches, local_path = await asyncio.to_thread(run_connect, repo_input, refresh)
         
         if success:
-            branches = checker.get_all_branches()
             return jsonify({
                 'success': True, 
                 'message': message,
                 'branches': branches,
-                'local_path': checker.local_path
+                'local_path': local_path
             })
         else:
             return jsonify({'success': False, 'message': message})
             
     except Exception as e:
-        print(f"连接仓库时发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception(f"连接仓库时发生错误: {e}")
         return jsonify({
             'success': False, 
             'message': f'连接失败: {str(e)}'
         })
 
 @app.route('/api/check_merge', methods=['POST'])
-def check_merge():
+async def check_merge():
     try:
-        data = request.json
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'success': False, 'message': '请求数据格式错误'})
             
         repo_input = data.get('repo_input', '')
         keyword = data.get('keyword', '')
         target_branch = data.get('target_branch', '')
         
-        if not all([repo_input, keyword, target_branch]):
-            return jsonify({'success': False, 'message': '请填写所有必要信息'})
-        
-        checker = GitBranchChecker(repo_input)
-        success, message = checker.connect_repo()
+        error_message = validate_merge_check_input(repo_input, keyword, target_branch)
+        if error_message:
+            return jsonify({'success': False, 'message': error_message})
         
+        refresh = request.args.get('refresh') == '1'
+        # git操作是阻塞的，放到线程中执行
+        success, message, results = await asyncio.to_thread(
+            run_merge_check, repo_input, keyword, target_branch, refresh
+        )
         if not success:
             return jsonify({'success': False, 'message': message})
         
-        results = checker.check_branch_merge_status(keyword, target_branch)
-        
         return jsonify({
             'success': True,
+            'message': message,
             'results': results
         })
         
     except Exception as e:
-        print(f"检查分支合并状态时发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception(f"检查分支合并状态时发生错误: {e}")
         return jsonify({
             'success': False, 
             'message': f'检查失败: {str(e)}'
         })
 
+@app.route('/api/check_merge/stream', methods=['POST'])
+def check_merge_stream():
+    """以Server-Sent Events逐个推送分支检查结果，每个分支检查完成后立即返回"""
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({'success': False, 'message': '请求数据格式错误'})
+    
+    repo_input = data.get('repo_input', '')
+    keyword = data.get('keyword', '')
+    target_branch = data.get('target_branch', '')
+    
+    error_message = validate_merge_check_input(repo_input, keyword, target_branch)
+    if error_message:
+        return jsonify({'success': False, 'message': error_message})
+    
+    refresh = request.args.get('refresh') == '1'
+    
+    def sse_event(payload):
+        return f"data: {app.json.dumps(payload)}\n\n"
+    
+    def generate():
+        try:
+            with connected_checker(repo_input, refresh, fetch=True) as (checker, success, message):
+                if not success:
+                    yield sse_event({'type': 'error', 'message': message})
+                    return
+                if not checker.last_fetch_ok:
+                    yield sse_event({'type': 'warning', 'message': FETCH_FAILED_MESSAGE})
+                
+                for result in checker.iter_branch_merge_status(keyword, target_branch):
+                    yield sse_event({'type': 'result', 'result': result})
+            
+            yield sse_event({'type': 'done'})
+        except Exception as e:
+            app.logger.exception(f"检查分支合并状态时发生错误: {e}")
+            yield sse_event({'type': 'error', 'message': f'检查失败: {str(e)}'})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def wait_for_server(port=5000, timeout=5.0, interval=0.025):
+    """等待本地服务器开始监听端口，超时返回False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.05):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
 def open_browser(port=5000):
-    """延迟打开浏览器"""
-    time.sleep(1.5)  # 等待服务器启动
+    """服务器就绪后打开浏览器"""
+    wait_for_server(port)  # 等待服务器启动，超时也照常打开
     webbrowser.open(f'http://localhost:{port}')
 
-def find_available_port(start_port=5000, max_attempts=10):
-    """查找可用端口"""
-    import socket
-    for port in range(start_port, start_port + max_attempts):
+def create_server_socket(host='127.0.0.1', start_port=5000):
+    """创建服务器监听套接字：优先使用start_port，被占用时由系统分配空闲端口
+    
+    套接字直接交给服务器使用，避免先探测端口再由服务器绑定之间被其他程序抢占
+    """
+    for port in (start_port, 0):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('127.0.0.1', port))
-                return port
+            # Windows下SO_REUSEADDR允许多个程序绑定同一端口，只在其他平台设置
+            if not sys.platform.startswith('win'):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((host, port))
+            sock.listen(128)
+            return sock
         except OSError:
-            continue
-    return None
+            sock.close()
+    raise OSError("无法创建服务器监听端口")
 
-def close_existing_processes():
-    """关闭已存在的pyBranchCheck进程"""
-    try:
-        import psutil
-        current_pid = os.getpid()
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.info['name'] and 'pyBranchCheck' in proc.info['name']:
-                    if proc.info['pid'] != current_pid:
-                        proc.terminate()
-                        print(f"已关闭之前的进程: PID {proc.info['pid']}")
-                elif proc.info['cmdline']:
-                    cmdline = ' '.join(proc.info['cmdline'])
-                    if 'app.py' in cmdline and 'pyBranchCheck' in cmdline:
-                        if proc.info['pid'] != current_pid:
-                            proc.terminate()
-                            print(f"已关闭之前的进程: PID {proc.info['pid']}")
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-    except ImportError:
-        # 如果没有psutil，尝试使用系统命令
-        try:
-            if sys.platform.startswith('win'):
-                subprocess.run(['taskkill', '/f', '/im', 'pyBranchCheck.exe'], 
-                             capture_output=True, check=False)
-        except Exception:
-            pass
-    except Exception as e:
-        print(f"关闭之前进程时出错: {e}")
+# 使用手册只在启动时显示一次，预先拼接好后一次写出（{port}为实际监听的端口）
+USER_MANUAL = "\n".join([
+    "\n" + "=" * 60,
+    "📖 Git分支检查工具 - 使用手册",
+    "=" * 60,
+    "\n🔧 重要文件说明:",
+    "┌─────────────────────────────────────────────────────────┐",
+    "│ 📄 config.json - 配置文件                               │",
+    "│    作用: 存储仓库配置和平台设置                          │",
+    "│    位置: 程序根目录                                      │",
+    "│    ⚠️  请勿手动删除，删除后需重新配置所有仓库             │",
+    "├─────────────────────────────────────────────────────────┤",
+    "│ 📁 temp_repos/ - 临时仓库文件夹                          │",
+    "│    作用: 存储克隆的Git仓库，用于分支检查                  │",
+    "│    位置: 程序根目录                                      │",
+    "│    ⚠️  可以删除以释放空间，但会重新下载仓库               │",
+    "└─────────────────────────────────────────────────────────┘",
+    "\n🚀 快速开始:",
+    "1. 在浏览器中打开 http://localhost:{port}",
+    "2. 在'配置管理'页面添加您的Git仓库",
+    "3. 在'分支检查'页面选择仓库并检查分支合并状态",
+    "\n💡 使用技巧:",
+    "• 支持SSH和HTTPS两种连接方式",
+    "• 分支关键字支持多个，用英文逗号分隔",
+    "• 程序会自动缓存仓库，提高检查速度",
+    "• 关闭此窗口将停止服务",
+    "\n⚠️  注意事项:",
+    "• 首次使用需要配置Git仓库信息",
+    "• 确保网络连接正常，能够访问Git仓库",
+    "• SSH连接需要配置好SSH密钥",
+    "• HTTPS连接可能需要输入用户名密码",
+    "\n" + "=" * 60,
+]) + "\n"
 
-def show_user_manual():
+def show_user_manual(port=5000):
     """显示用户使用手册和重要提示"""
-    print("\n" + "=" * 60)
-    print("📖 Git分支检查工具 - 使用手册")
-    print("=" * 60)
-    
-    print("\n🔧 重要文件说明:")
-    print("┌─────────────────────────────────────────────────────────┐")
-    print("│ 📄 config.json - 配置文件                               │")
-    print("│    作用: 存储仓库配置和平台设置                          │")
-    print("│    位置: 程序根目录                                      │")
-    print("│    ⚠️  请勿手动删除，删除后需重新配置所有仓库             │")
-    print("├─────────────────────────────────────────────────────────┤")
-    print("│ 📁 temp_repos/ - 临时仓库文件夹                          │")
-    print("│    作用: 存储克隆的Git仓库，用于分支检查                  │")
-    print("│    位置: 程序根目录                                      │")
-    print("│    ⚠️  可以删除以释放空间，但会重新下载仓库               │")
-    print("└─────────────────────────────────────────────────────────┘")
-    
-    print("\n🚀 快速开始:")
-    print("1. 在浏览器中打开 http://localhost:5000")
-    print("2. 在'配置管理'页面添加您的Git仓库")
-    print("3. 在'分支检查'页面选择仓库并检查分支合并状态")
-    
-    print("\n💡 使用技巧:")
-    print("• 支持SSH和HTTPS两种连接方式")
-    print("• 分支关键字支持多个，用英文逗号分隔")
-    print("• 程序会自动缓存仓库，提高检查速度")
-    print("• 关闭此窗口将停止服务")
-    
-    print("\n⚠️  注意事项:")
-    print("• 首次使用需要配置Git仓库信息")
-    print("• 确保网络连接正常，能够访问Git仓库")
-    print("• SSH连接需要配置好SSH密钥")
-    print("• HTTPS连接可能需要输入用户名密码")
-    
-    print("\n" + "=" * 60)
+    sys.stdout.write(USER_MANUAL.format(port=port))
+    sys.stdout.flush()
 
 
 
 if __name__ == '__main__':
     # 屏蔽Flask开发服务器警告
-    import warnings
-    from werkzeug.serving import WSGIRequestHandler
-    
-    # 过滤Flask开发服务器警告
     warnings.filterwarnings('ignore', message='This is a development server')
     warnings.filterwarnings('ignore', message='Do not use it in a production deployment')
     
     # 屏蔽werkzeug的日志输出
-    import logging
     log = logging.getLogger('werkzeug')
     log.setLevel(logging.ERROR)
     
@@ -1080,12 +1988,16 @@ if __name__ == '__main__':
             # 打包后的exe模式
             print("pyBranchCheck 正在启动...")
             
+            # 先占用监听端口，5000被占用时自动改用空闲端口
+            server_socket = create_server_socket('127.0.0.1', 5000)
+            port = server_socket.getsockname()[1]
+            
             # 显示用户手册
-            show_user_manual()
+            show_user_manual(port)
             
             print("\n🌐 服务器启动信息:")
             print("服务器启动后将自动打开浏览器")
-            print("如果浏览器没有自动打开，请手动访问: http://localhost:5000")
+            print(f"如果浏览器没有自动打开，请手动访问: http://localhost:{port}")
             print("关闭此窗口将停止服务")
             print("-" * 50)
             
@@ -1094,17 +2006,20 @@ if __name__ == '__main__':
             print(f"📁 配置文件位置: {config_path}")
             
             # 确保配置文件存在
-            load_config()  # 这会自动创建配置文件如果不存在
+            get_cached_config()  # 这会自动创建配置文件如果不存在，并缓存解析结果供后续请求使用
             
             # 初始化Git环境
             try:
-                setup_git_environment()
+                setup_git_environment(rediscover='--rediscover-git' in sys.argv)
                 print("✅ Git环境初始化成功")
                 
-                # 显示Git版本信息
-                result = subprocess.run(['git', '--version'], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    print(f"Git版本: {result.stdout.strip()}")
+                # 显示Git版本信息（探测Git时已获取的直接使用，否则仅在--verbose时额外查询）
+                if git_version:
+                    print(f"Git版本: {git_version}")
+                elif '--verbose' in sys.argv:
+                    result = subprocess.run(['git', '--version'], capture_output=True, text=True, timeout=5)
+                    if result.returncode == 0:
+                        print(f"Git版本: {result.stdout.strip()}")
             except Exception as e:
                 print("\n❌ 错误: Git环境初始化失败")
                 print("\n解决方案:")
@@ -1119,10 +2034,15 @@ if __name__ == '__main__':
                 sys.exit(1)
             
             # 在新线程中打开浏览器
-            threading.Thread(target=open_browser, daemon=True).start()
+            threading.Thread(target=open_browser, args=(port,), daemon=True).start()
             
-            # 生产模式运行
-            app.run(debug=False, host='127.0.0.1', port=5000)
+            # 生产模式运行，直接使用已绑定的套接字
+            if waitress is not None:
+                waitress.serve(app, sockets=[server_socket], threads=WAITRESS_THREADS)
+            else:
+                server = make_server('127.0.0.1', port, app, threaded=True, fd=server_socket.fileno())
+                server_socket.close()
+                server.serve_forever()
             
         except KeyboardInterrupt:
             print("\n程序已停止")
@@ -1130,29 +2050,32 @@ if __name__ == '__main__':
             print(f"\n❌ 程序启动失败: {str(e)}")
             print("\n可能的解决方案:")
             print("1. 确保已安装Git")
-            print("2. 确保端口5000未被占用")
+            print("2. 确保有可用的本地端口")
             print("3. 以管理员身份运行程序")
             print("\n按任意键退出...")
             input()
             sys.exit(1)
     else:
         # 开发模式 - 也需要初始化Git环境
-        try:
-            setup_git_environment()
-            print("Git环境初始化成功")
-            
-            # 显示配置文件路径
-            config_path = get_config_path()
-            print(f"📁 配置文件位置: {config_path}")
-            
-            # 确保配置文件存在
-            load_config()  # 这会自动创建配置文件如果不存在
-            
-            # 显示用户手册
-            show_user_manual()
-            
-        except Exception as e:
-            print(f"警告: Git环境初始化失败 - {e}")
-            print("某些功能可能无法正常工作")
+        # debug模式下reloader会启动子进程运行服务，父进程只负责监控文件变化，
+        # 因此启动前的初始化只在实际处理请求的子进程中执行，避免执行两次
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            try:
+                setup_git_environment()
+                print("Git环境初始化成功")
+                
+                # 显示配置文件路径
+                config_path = get_config_path()
+                print(f"📁 配置文件位置: {config_path}")
+                
+                # 确保配置文件存在
+                get_cached_config()  # 这会自动创建配置文件如果不存在，并缓存解析结果供后续请求使用
+                
+                # 显示用户手册
+                show_user_manual()
+                
+            except Exception as e:
+                print(f"警告: Git环境初始化失败 - {e}")
+                print("某些功能可能无法正常工作")
         
         app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
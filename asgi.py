@@ -0,0 +1,11 @@
+"""ASGI入口 - 通过asgiref将Flask应用包装为ASGI应用，可使用uvicorn/hypercorn运行
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+仓库克隆/拉取的锁保存在进程内，只能运行一个worker进程
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from wsgi import application as wsgi_application
+
+application = WsgiToAsgi(wsgi_application)
@@ -0,0 +1,16 @@
+"""gunicorn配置 - 使用gthread线程worker，避免一个耗时的git操作占住整个worker进程
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+可通过环境变量调整：GUNICORN_BIND、GUNICORN_THREADS、GUNICORN_TIMEOUT（GUNICORN_WORKERS请保持为1）
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+# 克隆/拉取的锁、fetch时间和后台拉取状态都保存在进程内，多个worker会同时操作temp_repos中的同一仓库，
+# 因此只使用一个worker，通过threads扩展并发
+workers = int(os.environ.get('GUNICORN_WORKERS', '1'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+# 首次克隆大仓库耗时较长，超时时间需要大于默认的30秒
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
@@ -0,0 +1,14 @@
+"""WSGI入口 - 生产环境部署时使用多线程WSGI服务器代替Flask开发服务器
+
+    waitress-serve --threads=32 --port=5000 wsgi:application
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+from app import app, setup_git_environment, get_cached_config
+
+# 初始化Git环境
+setup_git_environment()
+
+# 确保配置文件存在，并缓存解析结果
+get_cached_config()
+
+application = app